@@ -7,6 +7,10 @@ import re
 import html
 import tempfile
 import json
+import shutil
+import uuid
+import hashlib
+import threading
 from io import BytesIO
 from pdf2image import convert_from_path
 from PIL import Image
@@ -16,6 +20,7 @@ import streamlit as st
 import datetime
 from google.cloud import vision
 from google.oauth2 import service_account
+from boilerplate import strip_boilerplate
 
 logo_url = "https://nostmbdijzudpxxqmcxc.supabase.co/storage/v1/object/public/profile//logo.png"
 
@@ -47,16 +52,240 @@ def save_token_log(log_data):
     with open(LOG_FILE, "w") as f:
         json.dump(log_data, f, indent=2)
 
-def append_token_log(task, token_count):
+def append_token_log(task, token_count, saved=False):
     log_data = load_token_log()
     log_data.append({
         "timestamp": datetime.datetime.now().isoformat(),
         "task": task,
-        "tokens": token_count
+        "tokens": token_count,
+        "saved": saved  # True for tokens avoided (e.g. boilerplate removal), not spent
     })
     save_token_log(log_data)
 
+# === Single-Flight Request Deduplication ===
+# Teachers in the same batch often upload the same chapter within minutes of each
+# other. Identical OCR, Gemini and TTS requests that are in flight at the same time
+# are coalesced into one API call whose result is shared by every waiting session.
+# Streamlit reruns this script per interaction, so the state lives in cache_resource
+# to be shared process-wide.
+@st.cache_resource
+def single_flight_state():
+    return {"lock": threading.Lock(), "in_flight": {}, "counters": {}}
+
+def request_key(kind, parts):
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def single_flight(kind, parts, fn):
+    state = single_flight_state()
+    key = request_key(kind, parts)
+    with state["lock"]:
+        counters = state["counters"].setdefault(kind, {"calls": 0, "coalesced": 0})
+        counters["calls"] += 1
+
+    while True:
+        with state["lock"]:
+            call = state["in_flight"].get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "succeeded": False, "result": None, "error": None}
+                state["in_flight"][key] = call
+            else:
+                counters["coalesced"] += 1
+
+        if leader:
+            break
+        call["done"].wait()
+        if call["succeeded"]:
+            return call["result"]
+        if call["error"] is not None:
+            raise call["error"]
+        # The leader was stopped (rerun, stop, KeyboardInterrupt) without a result,
+        # so this caller retries and may become the new leader
+        with state["lock"]:
+            counters["coalesced"] -= 1
+
+    try:
+        call["result"] = fn()
+        call["succeeded"] = True
+        return call["result"]
+    except Exception as e:
+        call["error"] = e
+        raise
+    finally:
+        with state["lock"]:
+            state["in_flight"].pop(key, None)
+        call["done"].set()
+
+def single_flight_counters():
+    state = single_flight_state()
+    with state["lock"]:
+        return {kind: dict(counters) for kind, counters in state["counters"].items()}
+
+# === Artifact Store ===
+# Intermediates (upload, extracted text, scripts) are kept per job under artifacts/,
+# which Streamlit never serves. Finished MP3s go to static/audiobooks/, which
+# Streamlit's app static serving (.streamlit/config.toml, Streamlit >= 1.60) streams
+# from disk with range requests as audio/mpeg, up to 200 MB per file (about 14 hours
+# of 32 kbps TTS audio). A job ID in the URL lets a book be opened again later.
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_ROOT = os.path.join(APP_DIR, "artifacts")
+AUDIO_ROOT = os.path.join(APP_DIR, "static", "audiobooks")
+AUDIO_URL = "app/static/audiobooks"
+ARTIFACT_MAX_JOBS = 100        # idle jobs beyond the newest 100 are removed...
+ARTIFACT_MIN_IDLE_HOURS = 24   # ...once untouched for at least this long
+ARTIFACT_MAX_AGE_DAYS = 7      # anything untouched for longer than this is removed
+MANIFEST_FILE = "manifest.json"
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def check_job_id(job_id):
+    if not JOB_ID_PATTERN.match(job_id or ""):
+        raise ValueError(f"Invalid job ID: {job_id}")
+    return job_id
+
+def job_dir(job_id):
+    return os.path.join(ARTIFACT_ROOT, check_job_id(job_id))
+
+def touch_job(job_id):
+    # Marks a job as in use so pruning leaves it alone
+    try:
+        os.utime(job_dir(job_id))
+    except FileNotFoundError:
+        pass
+
+def prune_artifacts():
+    if not os.path.isdir(ARTIFACT_ROOT):
+        return
+    now = datetime.datetime.now().timestamp()
+    jobs = []
+    for job_id in os.listdir(ARTIFACT_ROOT):
+        if not JOB_ID_PATTERN.match(job_id):
+            continue
+        try:
+            jobs.append((os.path.getmtime(job_dir(job_id)), job_id))
+        except FileNotFoundError:
+            continue  # removed by another session's prune
+    for i, (mtime, job_id) in enumerate(sorted(jobs, reverse=True)):
+        idle_hours = (now - mtime) / 3600
+        expired = idle_hours > ARTIFACT_MAX_AGE_DAYS * 24
+        over_limit = i >= ARTIFACT_MAX_JOBS and idle_hours > ARTIFACT_MIN_IDLE_HOURS
+        if expired or over_limit:
+            shutil.rmtree(job_dir(job_id), ignore_errors=True)
+            shutil.rmtree(os.path.join(AUDIO_ROOT, job_id), ignore_errors=True)
+
+def new_job(source_name):
+    prune_artifacts()
+    job_id = uuid.uuid4().hex
+    os.makedirs(job_dir(job_id))
+    save_manifest(job_id, {"source": source_name, "created": datetime.datetime.now().isoformat(), "audiobook": None})
+    return job_id
+
+def artifact_path(job_id, name):
+    return os.path.join(job_dir(job_id), name)
+
+def audio_path(job_id, name):
+    return os.path.join(AUDIO_ROOT, check_job_id(job_id), name)
+
+def load_manifest(job_id):
+    if not JOB_ID_PATTERN.match(job_id or ""):
+        return None
+    try:
+        with open(artifact_path(job_id, MANIFEST_FILE), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None  # pruned
+
+def save_manifest(job_id, manifest):
+    with open(artifact_path(job_id, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+def save_upload(job_id, uploaded_file):
+    path = artifact_path(job_id, "source." + uploaded_file.name.split(".")[-1].lower())
+    uploaded_file.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f)
+    return path
+
+def save_artifact_text(job_id, name, text):
+    with open(artifact_path(job_id, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+def store_audiobook(job_id, src_path):
+    # Every synthesis gets its own filename, so players and HTTP caches never
+    # hold on to the audio from an earlier run of the same job
+    manifest = load_manifest(job_id)
+    if manifest is None:
+        os.remove(src_path)
+        return None
+    name = f"audiobook-{uuid.uuid4().hex[:8]}.mp3"
+    os.makedirs(os.path.dirname(audio_path(job_id, name)), exist_ok=True)
+    shutil.move(src_path, audio_path(job_id, name))
+    if manifest["audiobook"] and os.path.exists(audio_path(job_id, manifest["audiobook"])):
+        os.remove(audio_path(job_id, manifest["audiobook"]))
+    manifest["audiobook"] = name
+    save_manifest(job_id, manifest)
+    return name
+
+def list_audiobooks(job_ids):
+    jobs = []
+    for job_id in job_ids:
+        manifest = load_manifest(job_id)
+        if manifest and manifest["audiobook"] and os.path.exists(audio_path(job_id, manifest["audiobook"])):
+            jobs.append({"job_id": job_id, **manifest})
+    return sorted(jobs, key=lambda job: job["created"], reverse=True)
+
+def open_job(job_id):
+    # Adds a job to this session and puts it in the URL so a reload finds it again
+    if load_manifest(job_id) is None:
+        return False
+    if job_id not in st.session_state.setdefault("job_ids", []):
+        st.session_state.job_ids.append(job_id)
+    st.query_params["job"] = job_id
+    return True
+
+def show_audiobook(job_id, audiobook):
+    url = f"{AUDIO_URL}/{job_id}/{audiobook}"
+    size_mb = os.path.getsize(audio_path(job_id, audiobook)) / (1024 * 1024)
+    st.markdown(
+        f"""
+        <audio controls preload="none" src="{url}" style="width: 100%;"></audio>
+        <a href="{url}" download="audiobook-{job_id[:8]}.mp3">⬇️ Download Audiobook</a> ({size_mb:.1f} MB)
+        """,
+        unsafe_allow_html=True
+    )
+    st.caption(f"Job ID: `{job_id}` — open this page with `?job={job_id}` to find this audiobook again")
+
 # === Utility Functions ===
+def ocr_text(response):
+    # full_text_annotation.text has no blank lines, so the text is rebuilt from
+    # Vision's blocks with a blank line between them to keep paragraph boundaries
+    break_type = vision.TextAnnotation.DetectedBreak.BreakType
+    blocks = []
+    for page in response.full_text_annotation.pages:
+        for block in page.blocks:
+            text = ""
+            for paragraph in block.paragraphs:
+                for word in paragraph.words:
+                    for symbol in word.symbols:
+                        text += symbol.text
+                        detected = symbol.property.detected_break.type_
+                        if detected in (break_type.SPACE, break_type.SURE_SPACE):
+                            text += " "
+                        elif detected in (break_type.EOL_SURE_SPACE, break_type.LINE_BREAK):
+                            text += "\n"
+                        elif detected == break_type.HYPHEN:
+                            text += "-\n"
+            if text.strip():
+                blocks.append(text.strip())
+    return "\n\n".join(blocks)
+
 def extract_text(path):
     try:
         client = vision.ImageAnnotatorClient(credentials=credentials)
@@ -70,7 +299,7 @@ def extract_text(path):
                         content = f.read()
                     image = vision.Image(content=content)
                     response = client.text_detection(image=image)
-                    page_text = response.full_text_annotation.text
+                    page_text = ocr_text(response)
                     if len(page_text.strip()) > 20:
                         text += f"\n[Page {i+1}]\n{page_text}"
             log_tokens("Vision OCR", text)
@@ -80,7 +309,7 @@ def extract_text(path):
                 content = image_file.read()
             image = vision.Image(content=content)
             response = client.text_detection(image=image)
-            text = response.full_text_annotation.text
+            text = ocr_text(response)
             log_tokens("Vision OCR", text)
             return text
         elif path.endswith(".txt"):
@@ -252,32 +481,40 @@ def log_tts_tokens(label, chunks):
         token_logs.append((f"TTS: {label}", token_count))
         append_token_log(f"TTS: {label}", token_count)
 
+def synthesize_speech(client, label, plain_text, language_code, voice_name, config):
+    def call():
+        log_tts_tokens(label, [plain_text])
+        response = client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=plain_text),
+            voice=texttospeech.VoiceSelectionParams(language_code=language_code, name=voice_name),
+            audio_config=texttospeech.AudioConfig(**config)
+        )
+        return response.audio_content
+    return single_flight("TTS", [plain_text, language_code, voice_name, config], call)
+
 def synthesize_chunks(chunks, voice_name, language_code, speaking_rate, pitch, use_rate, use_pitch):
     client = texttospeech.TextToSpeechClient(credentials=credentials)
-    audio_chunks = []
+    # Chunks are written to disk as they arrive so memory stays flat for long books
+    temp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+    chunks_written = 0
     for chunk in chunks:
         plain_text = re.sub(r"<[^>]+>", "", chunk)
         if not plain_text.strip():
             continue
 
-        log_tts_tokens("Narration", [plain_text])
-        input_text = texttospeech.SynthesisInput(text=plain_text)
-        voice = texttospeech.VoiceSelectionParams(language_code=language_code, name=voice_name)
         config = {"audio_encoding": texttospeech.AudioEncoding.MP3}
         if use_rate: config["speaking_rate"] = speaking_rate
         if use_pitch: config["pitch"] = pitch
-        audio_config = texttospeech.AudioConfig(**config)
         try:
-            response = client.synthesize_speech(input=input_text, voice=voice, audio_config=audio_config)
-            audio_chunks.append(response.audio_content)
+            audio_content = synthesize_speech(client, "Narration", plain_text, language_code, voice_name, config)
+            temp_mp3.write(audio_content)
+            chunks_written += 1
         except Exception as e:
             st.warning(f"Chunk failed: {e}")
-    if audio_chunks:
-        temp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-        with open(temp_mp3.name, "wb") as f:
-            for chunk in audio_chunks:
-                f.write(chunk)
+    temp_mp3.close()
+    if chunks_written:
         return temp_mp3.name
+    os.remove(temp_mp3.name)
     return None
 
 # --- UPDATED FUNCTION ---
@@ -286,12 +523,13 @@ def generate_conversational_audio(script_lines, teacher_voice, student_voice, la
                                   teacher_rate, teacher_pitch, use_teacher_rate, use_teacher_pitch,
                                   student_rate, student_pitch, use_student_rate, use_student_pitch):
     client = texttospeech.TextToSpeechClient(credentials=credentials)
-    audio_chunks = []
+    temp_mp3 = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
+    chunks_written = 0
     current_speaker = None
     buffer = []
 
     def flush():
-        nonlocal buffer, current_speaker
+        nonlocal buffer, current_speaker, chunks_written
         if buffer and current_speaker:
             combined_text = " ".join(buffer).strip()
             if not combined_text:
@@ -300,10 +538,6 @@ def generate_conversational_audio(script_lines, teacher_voice, student_voice, la
             
             voice_name = teacher_voice if current_speaker == "teacher" else student_voice
             plain_text = re.sub(r"<[^>]+>", "", combined_text)
-            log_tts_tokens(current_speaker.capitalize(), [plain_text])
-            
-            input_text = texttospeech.SynthesisInput(text=plain_text)
-            voice = texttospeech.VoiceSelectionParams(language_code=language_code, name=voice_name)
             
             # --- CORE LOGIC CHANGE ---
             # Dynamically set pitch and rate based on the current speaker.
@@ -314,13 +548,14 @@ def generate_conversational_audio(script_lines, teacher_voice, student_voice, la
             elif current_speaker == "student":
                 if use_student_rate: config["speaking_rate"] = student_rate
                 if use_student_pitch: config["pitch"] = student_pitch
-            
-            audio_config = texttospeech.AudioConfig(**config)
             # --- END OF CORE LOGIC CHANGE ---
             
             try:
-                response = client.synthesize_speech(input=input_text, voice=voice, audio_config=audio_config)
-                audio_chunks.append(response.audio_content)
+                audio_content = synthesize_speech(
+                    client, current_speaker.capitalize(), plain_text, language_code, voice_name, config
+                )
+                temp_mp3.write(audio_content)
+                chunks_written += 1
             except Exception as e:
                 st.warning(f"Block failed ({current_speaker}): {e}")
         buffer = []
@@ -338,11 +573,10 @@ def generate_conversational_audio(script_lines, teacher_voice, student_voice, la
             buffer.append(line)
     flush() # Flush the last speaker's buffer
 
-    if audio_chunks:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_mp3:
-            for chunk in audio_chunks:
-                temp_mp3.write(chunk)
-            return temp_mp3.name
+    temp_mp3.close()
+    if chunks_written:
+        return temp_mp3.name
+    os.remove(temp_mp3.name)
     return None
 
 # === Streamlit UI ===
@@ -362,6 +596,12 @@ st.markdown(
 )
 st.title("🎙️ AI-Powered Audiobook Generator")
 
+# A job in the URL survives a browser refresh; this session's jobs are kept fresh
+if "job" in st.query_params and open_job(st.query_params["job"]):
+    st.session_state.setdefault("audio_job_id", st.query_params["job"])
+for session_job_id in st.session_state.get("job_ids", []):
+    touch_job(session_job_id)
+
 uploaded_file = st.file_uploader("📂 Upload PDF, Image, or Text File", type=["pdf", "png", "jpg", "jpeg", "txt"])
 conversation_mode = st.checkbox("🧠 Enable Conversation Mode")
 
@@ -407,34 +647,39 @@ with col2:
 prompt_override = st.text_area("✍️ Optional: Override Gemini Prompt (use {raw_text} to include content)", "", height=150)
 
 if uploaded_file and st.button("🧠 Generate Teaching Script"):
-    suffix = uploaded_file.name.split(".")[-1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix="." + suffix) as tmp_file:
-        tmp_file.write(uploaded_file.read())
-        tmp_path = tmp_file.name
+    job_id = new_job(uploaded_file.name)
+    st.session_state.job_id = job_id
+    open_job(job_id)
+    source_path = save_upload(job_id, uploaded_file)
 
     with st.spinner("🔍 Extracting text and generating script..."):
-        raw_text = extract_text(tmp_path)
+        raw_text = single_flight("OCR", [file_digest(source_path), source_path.rsplit(".", 1)[-1]],
+                                 lambda: extract_text(source_path))
+        save_artifact_text(job_id, "raw_text.txt", raw_text)
         if not raw_text:
             st.error("❌ No text extracted.")
         else:
-            cleaned = clean_text(raw_text)
+            cleaned = clean_text(strip_boilerplate(raw_text))
+            tokens_saved = max(len(clean_text(raw_text).split()) - len(cleaned.split()), 0)
+            append_token_log(f"Boilerplate Removed: {uploaded_file.name}", tokens_saved, saved=True)
+            if tokens_saved:
+                st.info(f"🧹 Removed repeated headers/footers and duplicate paragraphs from {uploaded_file.name}: {tokens_saved} tokens saved")
             st.session_state.raw_text_for_prompt = cleaned # Store for optional override
             
             # Prepare the prompt based on override
             prompt_to_use = prompt_override.format(raw_text=cleaned) if prompt_override else ""
 
-            if conversation_mode:
-                script = generate_conversation_script(cleaned, language_mode, prompt_to_use)
-            else:
-                script = generate_teaching_script(cleaned, language_mode, prompt_to_use)
+            script_kind = "conversation" if conversation_mode else "teaching"
+            script_fn = generate_conversation_script if conversation_mode else generate_teaching_script
+            script = single_flight("Gemini", [script_kind, cleaned, language_mode, prompt_to_use],
+                                   lambda: script_fn(cleaned, language_mode, prompt_to_use))
                 
             if not script:
                 st.error("❌ Script generation failed.")
             else:
+                save_artifact_text(job_id, "script.txt", script)
                 st.session_state.generated_script = script
                 st.success("✅ Script generated successfully!")
-    
-    os.remove(tmp_path)
 
 
 if "generated_script" in st.session_state:
@@ -444,55 +689,90 @@ if "generated_script" in st.session_state:
 # --- UPDATED AUDIO GENERATION LOGIC ---
 # Removed the `generate_audio` wrapper and call specific functions directly.
 if "edited_script" in st.session_state and st.button("🔊 Generate Audiobook"):
-    with st.spinner("🎧 Synthesizing audio... This may take a moment."):
-        script = st.session_state.edited_script
-        audio_path = None 
+    job_id = st.session_state.job_id
+    if load_manifest(job_id) is None:
+        st.error("❌ This job has expired. Please generate the teaching script again.")
+    else:
+        with st.spinner("🎧 Synthesizing audio... This may take a moment."):
+            script = st.session_state.edited_script
+            save_artifact_text(job_id, "edited_script.txt", script)
+            audio_path = None 
         
-        if conversation_mode:
-            audio_path = generate_conversational_audio(
-                script_lines=script.splitlines(),
-                teacher_voice=teacher_voice,
-                student_voice=student_voice,
-                language_code=language_code,
-                teacher_rate=teacher_rate,
-                teacher_pitch=teacher_pitch,
-                use_teacher_rate=use_teacher_rate,
-                use_teacher_pitch=use_teacher_pitch,
-                student_rate=student_rate,
-                student_pitch=student_pitch,
-                use_student_rate=use_student_rate,
-                use_student_pitch=use_student_pitch
-            )
-        else: # Standard mode
-            chunks = split_by_bytes(script, max_bytes=max_bytes)
-            audio_path = synthesize_chunks(
-                chunks=chunks,
-                voice_name=voice_name,
-                language_code=language_code,
-                speaking_rate=speaking_rate,
-                pitch=pitch,
-                use_rate=use_rate,
-                use_pitch=use_pitch
-            )
-
-        if audio_path:
-            with open(audio_path, "rb") as f:
-                st.audio(f.read(), format="audio/mp3")
-                st.download_button("⬇️ Download Audiobook", f, file_name="audiobook.mp3")
-            os.remove(audio_path)
-        else:
-            st.error("❌ Audio generation failed.")
+            if conversation_mode:
+                audio_path = generate_conversational_audio(
+                    script_lines=script.splitlines(),
+                    teacher_voice=teacher_voice,
+                    student_voice=student_voice,
+                    language_code=language_code,
+                    teacher_rate=teacher_rate,
+                    teacher_pitch=teacher_pitch,
+                    use_teacher_rate=use_teacher_rate,
+                    use_teacher_pitch=use_teacher_pitch,
+                    student_rate=student_rate,
+                    student_pitch=student_pitch,
+                    use_student_rate=use_student_rate,
+                    use_student_pitch=use_student_pitch
+                )
+            else: # Standard mode
+                chunks = split_by_bytes(script, max_bytes=max_bytes)
+                audio_path = synthesize_chunks(
+                    chunks=chunks,
+                    voice_name=voice_name,
+                    language_code=language_code,
+                    speaking_rate=speaking_rate,
+                    pitch=pitch,
+                    use_rate=use_rate,
+                    use_pitch=use_pitch
+                )
+
+            if not audio_path:
+                st.error("❌ Audio generation failed.")
+            elif not store_audiobook(job_id, audio_path):
+                st.error("❌ This job has expired. Please generate the teaching script again.")
+            else:
+                st.session_state.audio_job_id = job_id
+
+# Served from the artifact store, so the player survives reruns without re-synthesis
+if "audio_job_id" in st.session_state:
+    manifest = load_manifest(st.session_state.audio_job_id)
+    if manifest and manifest["audiobook"]:
+        show_audiobook(st.session_state.audio_job_id, manifest["audiobook"])
+
+with st.expander("📚 Your Audiobooks"):
+    lookup_id = st.text_input("🔎 Open a previous audiobook by Job ID").strip()
+    if lookup_id and not open_job(lookup_id):
+        st.warning("No audiobook found for that Job ID (it may have expired).")
+    audiobooks = list_audiobooks(st.session_state.get("job_ids", []))
+    if audiobooks:
+        for job in audiobooks:
+            st.markdown(f"**{job['source']}** — `{job['created']}`")
+            show_audiobook(job["job_id"], job["audiobook"])
+    else:
+        st.info("No audiobooks generated yet.")
 
 with st.expander("📊 View Token Usage Logs"):
     log_data = load_token_log()
     if log_data:
-        total_tokens = sum(entry["tokens"] for entry in log_data)
+        total_tokens = sum(entry["tokens"] for entry in log_data if not entry.get("saved"))
+        saved_tokens = sum(entry["tokens"] for entry in log_data if entry.get("saved"))
         st.markdown(f"**Cumulative Total Tokens:** `{total_tokens}`")
+        st.markdown(f"**Tokens Saved by Boilerplate Removal:** `{saved_tokens}`")
 
         # Display latest 50 logs
         st.write("---")
         st.write("**Latest 50 Entries:**")
         for entry in reversed(log_data[-50:]):
-            st.markdown(f"- `{entry['timestamp']}` | **{entry['task']}**: {entry['tokens']} tokens")
+            label = "tokens saved" if entry.get("saved") else "tokens"
+            st.markdown(f"- `{entry['timestamp']}` | **{entry['task']}**: {entry['tokens']} {label}")
     else:
         st.info("No token logs yet.")
+
+with st.expander("🔁 View Coalesced Requests"):
+    counters = single_flight_counters()
+    if counters:
+        total_coalesced = sum(c["coalesced"] for c in counters.values())
+        st.markdown(f"**Duplicate API Calls Avoided:** `{total_coalesced}`")
+        for kind, c in counters.items():
+            st.markdown(f"- **{kind}**: {c['coalesced']} of {c['calls']} requests shared an in-flight call")
+    else:
+        st.info("No requests recorded yet.")
@@ -0,0 +1,131 @@
+# Boilerplate removal for OCR'd text, used by audio-book.py before prompting Gemini.
+# Smoke check: python boilerplate.py
+
+import re
+
+# Running headers, footers, page numbers and watermarks repeat on every OCR'd
+# page and only waste Gemini input tokens, so they are dropped before prompting.
+# Only the top and bottom edges of a page are considered; the page body is never
+# touched by the repeated-line or page-number rules.
+PAGE_MARKER = re.compile(r"\n?\[Page (\d+)\]\n")
+PAGE_NUMBER_LINE = re.compile(r"^\s*(page\s*)?\d{1,4}(\s*(of|/)\s*\d{1,4})?\s*$", re.IGNORECASE)
+# A page number joined to a header by a separator, e.g. "12 | Physics" or "Chapter 3 | Page 12"
+LEADING_PAGE_NUMBER = re.compile(r"^(\d{1,4})\s*[|·•–—-]\s*(.+)$")
+TRAILING_PAGE_NUMBER = re.compile(r"^(.+?)\s*(?:[|·•–—-]\s*(?:page\s*)?|\bpage\s*)(\d{1,4})$", re.IGNORECASE)
+SENTENCE_END = re.compile(r"[.?!]$")
+EDGE_LINES = 3                 # lines checked at the top and at the bottom of each page
+REPEATED_LINE_RATIO = 0.5      # line must appear on at least half the pages...
+REPEATED_LINE_MIN_PAGES = 3    # ...and on at least this many pages
+NEAR_DUPLICATE_SIMILARITY = 0.9
+NEAR_DUPLICATE_MIN_WORDS = 8
+
+def edge_key(line, page_no):
+    # Headers are compared verbatim, except that a page number joined by a
+    # separator is replaced by its offset from the [Page N] index, so it only
+    # matches when it moves with the page ("Physics | 41" on page 1, "| 42" on 2)
+    line = re.sub(r"\s+", " ", line.lower()).strip()
+    if SENTENCE_END.search(line):
+        return None  # running headers and footers are labels, not sentences
+    match = LEADING_PAGE_NUMBER.match(line)
+    if match:
+        return (match.group(2), int(match.group(1)) - page_no)
+    match = TRAILING_PAGE_NUMBER.match(line)
+    if match:
+        return (match.group(1), int(match.group(2)) - page_no)
+    return (line, None)
+
+def peel_edge(lines, page_no, repeated, strip_page_numbers):
+    # Removes boilerplate from the front of `lines`, stopping at the first body line
+    checked, page_number_seen = 0, False
+    while lines and checked < EDGE_LINES:
+        line = lines[0]
+        if line.strip():
+            checked += 1
+            if strip_page_numbers and not page_number_seen and PAGE_NUMBER_LINE.match(line):
+                page_number_seen = True
+            elif edge_key(line, page_no) not in repeated:
+                break
+        lines = lines[1:]
+    return lines
+
+def shingles(text, size=3):
+    words = re.findall(r"\w+", text.lower())
+    return {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+
+def remove_near_duplicate_paragraphs(text):
+    kept, seen = [], []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph.split()) >= NEAR_DUPLICATE_MIN_WORDS:
+            current = shingles(paragraph)
+            if any(len(current & prev) / len(current | prev) >= NEAR_DUPLICATE_SIMILARITY for prev in seen):
+                continue
+            seen.append(current)
+        kept.append(paragraph)
+    return "\n\n".join(kept)
+
+def split_pages(text):
+    # Returns (page_no, lines) pairs; text without [Page N] markers is a single page 1
+    parts = PAGE_MARKER.split(text)
+    pages = [(1, parts[0].splitlines())] if parts[0].strip() else []
+    pages += [(int(no), body.splitlines()) for no, body in zip(parts[1::2], parts[2::2]) if body.strip()]
+    return pages
+
+def strip_boilerplate(text):
+    # Images and .txt files carry no [Page N] markers, so bare numbers there are content
+    has_pages = bool(PAGE_MARKER.search(text))
+    pages = split_pages(text)
+    threshold = max(REPEATED_LINE_MIN_PAGES, int(len(pages) * REPEATED_LINE_RATIO))
+
+    page_counts = {}
+    for page_no, lines in pages:
+        non_blank = [l for l in lines if l.strip()]
+        edges = non_blank[:EDGE_LINES] + non_blank[-EDGE_LINES:]
+        for key in {edge_key(l, page_no) for l in edges} - {None}:
+            page_counts[key] = page_counts.get(key, 0) + 1
+    repeated = {key for key, count in page_counts.items() if count >= threshold}
+
+    # Blank lines inside a page are kept: they are the paragraph boundaries
+    kept_pages = []
+    for page_no, lines in pages:
+        lines = peel_edge(lines, page_no, repeated, has_pages)
+        lines = peel_edge(lines[::-1], page_no, repeated, has_pages)[::-1]
+        kept_pages.append("\n".join(lines).strip())
+
+    return remove_near_duplicate_paragraphs("\n\n".join(kept_pages))
+
+
+if __name__ == "__main__":
+    worked_examples = "".join(
+        f"\n[Page {n}]\nNCERT Physics Class 11 | {40 + n}\nExample 3.{n}\n"
+        f"A car moves {4 * n} m along a straight road at constant speed.\nFind the time taken.\n"
+        f"Solution\nt =\n{4 * n}\n5\nseconds\nAnswer: {4 * n} m/s\nPage {40 + n}\n"
+        for n in range(1, 7)
+    )
+    stripped = strip_boilerplate(worked_examples)
+    assert "NCERT Physics" not in stripped
+    assert "Page 41" not in stripped
+    for n in range(1, 7):
+        for body_line in (f"Example 3.{n}", "Find the time taken.", "Solution", "t =", f"{4 * n}\n5", "seconds", f"Answer: {4 * n} m/s"):
+            assert body_line in stripped, body_line
+
+    # Numbered headings move with the page too, but have no separator, so they stay
+    exercises = "".join(
+        f"\n[Page {n}]\nExercise {n}\nSolve for x in {n}x + 3 = 12.\nShow your work.\n"
+        for n in range(1, 7)
+    )
+    stripped = strip_boilerplate(exercises)
+    for n in range(1, 7):
+        assert f"Exercise {n}\n" in stripped + "\n", n
+    assert stripped.count("Show your work.") == 6
+
+    single_page = "Speed of sound\nv =\n330\n2\nAnswer: 165 m/s"
+    assert strip_boilerplate(single_page) == single_page
+
+    # A repeated paragraph is dropped whether it recurs across pages or within one text
+    paragraph = "Remember that the acceleration due to gravity near the surface is about 9.8 m/s2."
+    across_pages = f"\n[Page 1]\nMotion\n\n{paragraph}\n\nFirst body.\n[Page 2]\n{paragraph}\n\nSecond body.\n"
+    assert strip_boilerplate(across_pages).count(paragraph) == 1
+    assert "Second body." in strip_boilerplate(across_pages)
+    txt = f"Intro.\n\n{paragraph}\n\nMiddle.\n\n{paragraph}\n\nEnd."
+    assert strip_boilerplate(txt) == f"Intro.\n\n{paragraph}\n\nMiddle.\n\nEnd."
+    print("boilerplate smoke check passed")